@@ -1,21 +1,24 @@
 # app/agents/graph.py
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolExecutor
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 from typing import Dict, Any, List, TypedDict
 import json
 import uuid
-from app.agents.tools import UserQueryTool, ProjectQueryTool, UserManagementTool, ProjectManagementTool
-from app.models.schemas import OperationType
+from app.agents.tools import UserQueryTool, ProjectQueryTool, CrossEntityQueryTool, UserManagementTool, ProjectManagementTool
+from app.agents.scheduler import CallScheduler
+from app.agents.memory import sessions
+from app.models.schemas import OperationType, DEFAULT_USER_ID
 from app.config import settings
 
 # Initialize tools and executor
-tools = [UserQueryTool(), ProjectQueryTool(), UserManagementTool(), ProjectManagementTool()]
+tools = [UserQueryTool(), ProjectQueryTool(), CrossEntityQueryTool(), UserManagementTool(), ProjectManagementTool()]
 tool_executor = ToolExecutor(tools)
 
 # Define state
 class AgentState(TypedDict):
+    user_id: str
     messages: List
     current_tool: str
     tool_input: Dict[str, Any]
@@ -32,6 +35,14 @@ llm = ChatGoogleGenerativeAI(
 )
 llm_with_tools = llm.bind_tools(tools)
 
+# Caps concurrent Gemini calls, sheds load past a limit and serves users fairly
+llm_scheduler = CallScheduler(
+    llm_with_tools.invoke,
+    max_concurrency=settings.llm_max_concurrency,
+    max_outstanding=settings.llm_max_outstanding,
+    admission_timeout_s=settings.llm_admission_timeout_s,
+)
+
 def should_continue(state: AgentState) -> str:
     messages = state["messages"]
     last_message = messages[-1]
@@ -47,7 +58,7 @@ def should_continue(state: AgentState) -> str:
 
 def call_model(state: AgentState) -> AgentState:
     messages = state["messages"]
-    response = llm_with_tools.invoke(messages)
+    response = llm_scheduler.submit(state.get("user_id", DEFAULT_USER_ID), messages)
     
     # Check if this is a CUD operation that requires approval
     requires_approval = False
@@ -161,4 +172,28 @@ workflow.add_conditional_edges(
 )
 
 # Compile the graph
-graph = workflow.compile()
\ No newline at end of file
+graph = workflow.compile()
+
+def _to_message(turn: Dict[str, str]):
+    if turn["role"] == "user":
+        return HumanMessage(content=turn["content"])
+    if turn["role"] == "system":
+        return SystemMessage(content=turn["content"])
+    return AIMessage(content=turn["content"])
+
+def run_agent(user_id: str, query: str) -> AgentState:
+    """Run the graph for one query with the user's bounded conversation history"""
+    if user_id == DEFAULT_USER_ID:
+        # Shared by every anonymous caller, so it gets no memory
+        return graph.invoke({"user_id": user_id, "messages": [HumanMessage(content=query)]})
+    history = [_to_message(turn) for turn in sessions.context(user_id)]
+    state = graph.invoke({"user_id": user_id, "messages": history + [HumanMessage(content=query)]})
+    sessions.add_turn(user_id, "user", query)
+    seen = {id(message) for message in history}
+    tool_prefixes = tuple(f"{tool.name} result:" for tool in tools)
+    for message in state["messages"]:
+        if id(message) in seen or not isinstance(message, AIMessage) or not message.content:
+            continue
+        content = str(message.content)
+        sessions.add_turn(user_id, "tool" if content.startswith(tool_prefixes) else "assistant", content)
+    return state
@@ -0,0 +1,135 @@
+# app/agents/memory.py
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+import threading
+import time
+import uuid
+
+from app.config import settings
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting"""
+    return len(text) // 4 + 1
+
+
+class Session:
+    __slots__ = ("turns", "summary", "tokens", "refs", "state", "last_seen")
+
+    def __init__(self):
+        self.turns: List[Dict[str, Any]] = []
+        self.summary: List[str] = []
+        self.tokens = 0
+        self.refs: "OrderedDict[str, str]" = OrderedDict()
+        self.state: Dict[str, Any] = {}
+        self.last_seen = time.monotonic()
+
+
+class SessionStore:
+    """Per-user conversation memory with a bounded prompt footprint.
+
+    Sessions are kept in LRU order; the least recently used one is evicted
+    past max_sessions, and sessions idle for longer than idle_ttl_s are
+    dropped. Within a session, non-user turns longer than max_inline_tokens
+    are stored aside and replaced by a short reference, and once the turns
+    exceed token_budget the oldest ones are folded into a one-line-per-turn
+    summary, itself capped at a quarter of the budget. context() therefore
+    never returns much more than token_budget, however long the conversation.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl_s: float = 1800,
+                 token_budget: int = 2000, max_inline_tokens: int = 200,
+                 max_refs: int = 20):
+        self.max_sessions = max_sessions
+        self.idle_ttl_s = idle_ttl_s
+        self.token_budget = token_budget
+        self.max_inline_tokens = max_inline_tokens
+        self.max_refs = max_refs
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _session(self, user_id: str) -> Session:
+        # Called with the lock held
+        now = time.monotonic()
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if now - oldest.last_seen <= self.idle_ttl_s:
+                break
+            del self._sessions[oldest_id]
+
+        session = self._sessions.get(user_id)
+        if session is None:
+            session = self._sessions[user_id] = Session()
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(user_id)
+        session.last_seen = now
+        return session
+
+    def add_turn(self, user_id: str, role: str, content: str):
+        with self._lock:
+            session = self._session(user_id)
+            if role != "user" and estimate_tokens(content) > self.max_inline_tokens:
+                # Unguessable, so one user cannot read another's stored outputs
+                ref_id = f"ref-{uuid.uuid4().hex}"
+                session.refs[ref_id] = content
+                if len(session.refs) > self.max_refs:
+                    session.refs.popitem(last=False)
+                content = (f"[{role} output stored as {ref_id}, ~{estimate_tokens(content)} tokens] "
+                           f"{content[:200]}...")
+            tokens = estimate_tokens(content)
+            session.turns.append({"role": role, "content": content, "tokens": tokens})
+            session.tokens += tokens
+            self._trim(session)
+
+    def _trim(self, session: Session):
+        summary_budget = self.token_budget // 4
+        while session.tokens > self.token_budget - summary_budget and len(session.turns) > 1:
+            turn = session.turns.pop(0)
+            session.tokens -= turn["tokens"]
+            session.summary.append(f"{turn['role']}: {turn['content'][:120]}")
+        while session.summary and estimate_tokens("\n".join(session.summary)) > summary_budget:
+            session.summary.pop(0)
+
+    def context(self, user_id: str) -> List[Dict[str, str]]:
+        """Messages to prepend to the next prompt, oldest first"""
+        with self._lock:
+            session = self._session(user_id)
+            messages = []
+            if session.summary:
+                messages.append({
+                    "role": "system",
+                    "content": "Summary of earlier conversation:\n" + "\n".join(session.summary),
+                })
+            messages.extend({"role": t["role"], "content": t["content"]} for t in session.turns)
+            return messages
+
+    def get_ref(self, user_id: str, ref_id: str) -> Optional[str]:
+        with self._lock:
+            session = self._sessions.get(user_id)
+            return session.refs.get(ref_id) if session else None
+
+    def get_state(self, user_id: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._session(user_id).state.get(key, default)
+
+    def set_state(self, user_id: str, key: str, value: Any):
+        with self._lock:
+            self._session(user_id).state[key] = value
+
+    def clear(self, user_id: str):
+        with self._lock:
+            self._sessions.pop(user_id, None)
+
+
+# The one store shared by the keyword path in main.py and the agent graph
+sessions = SessionStore(
+    max_sessions=settings.session_max_sessions,
+    idle_ttl_s=settings.session_idle_ttl_s,
+    token_budget=settings.session_token_budget,
+    max_inline_tokens=settings.session_max_inline_tokens,
+)
@@ -0,0 +1,131 @@
+# app/agents/scheduler.py
+from typing import Any, Callable, Deque, Dict, List, Optional
+from collections import OrderedDict, deque
+import threading
+import time
+
+
+class SchedulerOverloadedError(Exception):
+    """Raised when a call cannot be admitted because too many are outstanding"""
+
+
+class _PendingCall:
+    __slots__ = ("user_id", "payload", "enqueued_at", "done", "result", "error")
+
+    def __init__(self, user_id: str, payload: Any):
+        self.user_id = user_id
+        self.payload = payload
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class CallScheduler:
+    """Admission control and per-user fairness for model calls.
+
+    submit() blocks the calling thread until fn(payload) has run on one of
+    max_concurrency worker threads, so at most that many calls reach the
+    provider at once. Waiting calls are started round-robin across users,
+    so one busy user cannot starve the others. Once max_outstanding calls
+    are queued or running, new calls wait up to admission_timeout_s for
+    room and are then rejected with SchedulerOverloadedError (0 sheds
+    immediately).
+    """
+
+    def __init__(self, fn: Callable[[Any], Any], max_concurrency: int = 4,
+                 max_outstanding: int = 64, admission_timeout_s: float = 0):
+        self.fn = fn
+        self.max_concurrency = max_concurrency
+        self.max_outstanding = max_outstanding
+        self.admission_timeout_s = admission_timeout_s
+
+        self._lock = threading.Lock()
+        self._queued = threading.Condition(self._lock)
+        self._room = threading.Condition(self._lock)
+        self._queues: "OrderedDict[str, Deque[_PendingCall]]" = OrderedDict()
+        self._queue_depth = 0
+        self._in_flight = 0
+        self._threads: List[threading.Thread] = []
+
+        self._calls = 0
+        self._shed = 0
+        self._total_wait_s = 0.0
+        self._max_wait_seen_s = 0.0
+
+    def submit(self, user_id: str, payload: Any) -> Any:
+        call = _PendingCall(user_id, payload)
+        with self._lock:
+            self._start_workers()
+            deadline = time.monotonic() + self.admission_timeout_s
+            while self._queue_depth + self._in_flight >= self.max_outstanding:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._shed += 1
+                    raise SchedulerOverloadedError(
+                        f"{self.max_outstanding} model calls already outstanding, try again later"
+                    )
+                self._room.wait(remaining)
+            call.enqueued_at = time.monotonic()
+            self._queues.setdefault(user_id, deque()).append(call)
+            self._queue_depth += 1
+            self._queued.notify()
+
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queue_depth": self._queue_depth,
+                "in_flight": self._in_flight,
+                "queued_users": len(self._queues),
+                "calls": self._calls,
+                "avg_wait_ms": 1000 * self._total_wait_s / self._calls if self._calls else 0.0,
+                "max_wait_ms": 1000 * self._max_wait_seen_s,
+                "shed": self._shed,
+            }
+
+    def _start_workers(self):
+        # Called with the lock held
+        if self._threads:
+            return
+        for n in range(self.max_concurrency):
+            thread = threading.Thread(target=self._worker, name=f"call-scheduler-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _take_next(self) -> _PendingCall:
+        """Pop the next user's oldest call and move that user to the back (lock held)"""
+        user_id, queue = next(iter(self._queues.items()))
+        call = queue.popleft()
+        if queue:
+            self._queues.move_to_end(user_id)
+        else:
+            del self._queues[user_id]
+        self._queue_depth -= 1
+        return call
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                while not self._queue_depth:
+                    self._queued.wait()
+                call = self._take_next()
+                self._in_flight += 1
+                wait = time.monotonic() - call.enqueued_at
+                self._calls += 1
+                self._total_wait_s += wait
+                self._max_wait_seen_s = max(self._max_wait_seen_s, wait)
+
+            try:
+                call.result = self.fn(call.payload)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._room.notify()
+                call.done.set()
@@ -4,11 +4,14 @@ from typing import Optional, Type, List, Dict, Any
 from pydantic import BaseModel, Field
 from app.database.mock_db1 import UsersDB
 from app.database.mock_db2 import ProjectsDB
+from app.database.versioned_store import VersionConflictError
+from app.database.join_index import ManagerIndex
 from app.models.schemas import OperationType
 
 # Initialize databases
 users_db = UsersDB()
 projects_db = ProjectsDB()
+manager_index = ManagerIndex(users_db, projects_db)
 
 class UserQueryInput(BaseModel):
     query_type: str = Field(description="Type of query: 'all_users', 'user_by_id', or 'users_by_department'")
@@ -20,6 +23,12 @@ class ProjectQueryInput(BaseModel):
     project_id: Optional[int] = Field(default=None, description="Project ID for specific query")
     status: Optional[str] = Field(default=None, description="Project status for filtering")
 
+class CrossEntityQueryInput(BaseModel):
+    query_type: str = Field(description="Type of query: 'projects_by_manager_department', 'project_with_manager', or 'projects_managed_by_user'")
+    department: Optional[str] = Field(default=None, description="Department of the managing users")
+    project_id: Optional[int] = Field(default=None, description="Project ID whose manager to resolve")
+    user_id: Optional[int] = Field(default=None, description="User ID whose managed projects to list")
+
 class UserManagementInput(BaseModel):
     operation: str = Field(description="Operation: 'create_user', 'update_user', or 'delete_user'")
     user_id: Optional[int] = Field(default=None, description="User ID for update/delete")
@@ -27,6 +36,7 @@ class UserManagementInput(BaseModel):
     email: Optional[str] = Field(default=None, description="User email for creation")
     department: Optional[str] = Field(default=None, description="User department for creation")
     updates: Optional[Dict[str, Any]] = Field(default=None, description="Updates for user")
+    expected_version: Optional[int] = Field(default=None, description="Only update if the user is still at this version")
 
 class ProjectManagementInput(BaseModel):
     operation: str = Field(description="Operation: 'create_project', 'update_project', or 'delete_project'")
@@ -36,6 +46,7 @@ class ProjectManagementInput(BaseModel):
     budget: Optional[float] = Field(default=None, description="Project budget for creation")
     manager: Optional[str] = Field(default=None, description="Project manager for creation")
     updates: Optional[Dict[str, Any]] = Field(default=None, description="Updates for project")
+    expected_version: Optional[int] = Field(default=None, description="Only update if the project is still at this version")
 
 class UserQueryTool(BaseTool):
     name = "user_query_tool"
@@ -79,13 +90,39 @@ class ProjectQueryTool(BaseTool):
         except Exception as e:
             return f"Error querying projects: {str(e)}"
 
+class CrossEntityQueryTool(BaseTool):
+    name = "cross_entity_query_tool"
+    description = ("Join projects with the users who manage them, e.g. projects managed by a department "
+                   "or a project's manager email. Each result is a project with manager_id, manager_name, "
+                   "manager_email, manager_department and manager_match ('linked', 'ambiguous' with "
+                   "manager_candidate_ids, or 'not_found'). Use for read operations only.")
+    args_schema: Type[BaseModel] = CrossEntityQueryInput
+
+    def _run(self, query_type: str, department: Optional[str] = None, project_id: Optional[int] = None,
+             user_id: Optional[int] = None) -> str:
+        try:
+            if query_type == "projects_by_manager_department" and department:
+                results = manager_index.projects_by_manager_department(department)
+            elif query_type == "project_with_manager" and project_id:
+                result = manager_index.project_with_manager(project_id)
+                results = [result] if result else []
+            elif query_type == "projects_managed_by_user" and user_id:
+                results = manager_index.projects_managed_by_user(user_id)
+            else:
+                return "Invalid query parameters for cross-entity query"
+
+            return f"Cross-entity query results: {results}" if results else "No projects found matching the criteria"
+        except Exception as e:
+            return f"Error running cross-entity query: {str(e)}"
+
 class UserManagementTool(BaseTool):
     name = "user_management_tool"
     description = "Manage users (create_user, update_user, delete_user) - requires approval for all operations"
     args_schema: Type[BaseModel] = UserManagementInput
 
     def _run(self, operation: str, user_id: Optional[int] = None, name: Optional[str] = None, 
-             email: Optional[str] = None, department: Optional[str] = None, updates: Optional[Dict[str, Any]] = None) -> str:
+             email: Optional[str] = None, department: Optional[str] = None, updates: Optional[Dict[str, Any]] = None,
+             expected_version: Optional[int] = None) -> str:
         try:
             if operation == "create_user":
                 if not all([name, email, department]):
@@ -93,13 +130,15 @@ class UserManagementTool(BaseTool):
                 result = users_db.create_user(name, email, department)
                 return f"User created successfully: {result}"
             elif operation == "update_user" and user_id and updates:
-                result = users_db.update_user(user_id, updates)
+                result = users_db.update_user(user_id, updates, expected_version)
                 return f"User updated successfully: {result}" if result else "User not found"
             elif operation == "delete_user" and user_id:
                 success = users_db.delete_user(user_id)
                 return "User deleted successfully" if success else "User not found"
             else:
                 return "Invalid operation or missing parameters for user management"
+        except VersionConflictError as e:
+            return f"User was modified concurrently, re-read it and retry: {str(e)}"
         except Exception as e:
             return f"Error managing user: {str(e)}"
 
@@ -110,7 +149,7 @@ class ProjectManagementTool(BaseTool):
 
     def _run(self, operation: str, project_id: Optional[int] = None, name: Optional[str] = None,
              status: Optional[str] = None, budget: Optional[float] = None, manager: Optional[str] = None,
-             updates: Optional[Dict[str, Any]] = None) -> str:
+             updates: Optional[Dict[str, Any]] = None, expected_version: Optional[int] = None) -> str:
         try:
             if operation == "create_project":
                 if not all([name, status, budget, manager]):
@@ -118,12 +157,14 @@ class ProjectManagementTool(BaseTool):
                 result = projects_db.create_project(name, status, budget, manager)
                 return f"Project created successfully: {result}"
             elif operation == "update_project" and project_id and updates:
-                result = projects_db.update_project(project_id, updates)
+                result = projects_db.update_project(project_id, updates, expected_version)
                 return f"Project updated successfully: {result}" if result else "Project not found"
             elif operation == "delete_project" and project_id:
                 success = projects_db.delete_project(project_id)
                 return "Project deleted successfully" if success else "Project not found"
             else:
                 return "Invalid operation or missing parameters for project management"
+        except VersionConflictError as e:
+            return f"Project was modified concurrently, re-read it and retry: {str(e)}"
         except Exception as e:
             return f"Error managing project: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,109 @@
+# app/assets.py
+from typing import Dict, Optional, Tuple
+import hashlib
+import mimetypes
+import os
+import threading
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from fastapi.templating import Jinja2Templates
+
+from app.compression import COMPRESSIBLE_TYPES, choose_encoding, compress_all
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class CompressedAsset:
+    """A response body held in memory with its precompressed variants and ETags.
+
+    Each encoding is a different representation, so each gets its own ETag.
+    """
+
+    def __init__(self, body: bytes, media_type: str):
+        self.media_type = media_type
+        self.digest = hashlib.sha256(body).hexdigest()
+        self.variants = compress_all(body) if media_type.startswith(COMPRESSIBLE_TYPES) else {None: body}
+        self.etags = {
+            encoding: f'"{self.digest[:16]}-{encoding}"' if encoding else f'"{self.digest[:16]}"'
+            for encoding in self.variants
+        }
+
+    def response(self, request: Request, cache_control: str) -> Response:
+        offered = tuple(encoding for encoding in self.variants if encoding)
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), offered)
+        etag = self.etags[encoding]
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(self.variants[encoding], media_type=self.media_type, headers=headers)
+
+
+class StaticAssets:
+    """Files under a static directory, served from memory with content-hashed URLs.
+
+    Every file is read and precompressed once at startup. url("css/style.css")
+    returns "/static/css/style.<hash>.css"; that name is served with an
+    immutable one-year Cache-Control, since a changed file gets a new name.
+    The plain name still works but must be revalidated.
+    """
+
+    def __init__(self, directory: str, prefix: str = "/static"):
+        self.prefix = prefix
+        self._files: Dict[str, Tuple[CompressedAsset, str]] = {}
+        self._urls: Dict[str, str] = {}
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                full_path = os.path.join(root, filename)
+                path = os.path.relpath(full_path, directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    body = f.read()
+                media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                if media_type.startswith("text/"):
+                    media_type += "; charset=utf-8"
+                asset = CompressedAsset(body, media_type)
+                stem, ext = os.path.splitext(path)
+                hashed_path = f"{stem}.{asset.digest[:10]}{ext}"
+                self._files[path] = (asset, REVALIDATE)
+                self._files[hashed_path] = (asset, IMMUTABLE)
+                self._urls[path] = f"{prefix}/{hashed_path}"
+
+    def url(self, path: str) -> str:
+        path = path.lstrip("/")
+        return self._urls.get(path, f"{self.prefix}/{path}")
+
+    def response(self, request: Request, path: str) -> Response:
+        entry = self._files.get(path.lstrip("/"))
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+        asset, cache_control = entry
+        return asset.response(request, cache_control)
+
+
+class PageCache:
+    """Renders each template once and serves the stored, precompressed HTML.
+
+    Only for templates that do not depend on the request; pages are cached
+    for the process lifetime and revalidated by ETag.
+    """
+
+    def __init__(self, templates: Jinja2Templates):
+        self.templates = templates
+        self._pages: Dict[str, CompressedAsset] = {}
+        self._lock = threading.Lock()
+
+    def _page(self, name: str) -> CompressedAsset:
+        page: Optional[CompressedAsset] = self._pages.get(name)
+        if page is None:
+            with self._lock:
+                page = self._pages.get(name)
+                if page is None:
+                    html = self.templates.get_template(name).render()
+                    page = self._pages[name] = CompressedAsset(html.encode("utf-8"), "text/html; charset=utf-8")
+        return page
+
+    def response(self, request: Request, name: str) -> Response:
+        return self._page(name).response(request, REVALIDATE)
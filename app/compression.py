@@ -0,0 +1,100 @@
+# app/compression.py
+from typing import Dict, Optional, Tuple
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+
+
+def available_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str, offered: Optional[Tuple[str, ...]] = None) -> Optional[str]:
+    """Best offered encoding (default: all we support) from an Accept-Encoding header, brotli first"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    for encoding in offered if offered is not None else available_encodings():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """Fast settings for per-request bodies; best=True for bodies compressed once and reused"""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else 4)
+    return gzip.compress(body, compresslevel=9 if best else 6)
+
+
+def compress_all(body: bytes) -> Dict[Optional[str], bytes]:
+    """Every supported encoding of body that is actually smaller, plus the identity under None"""
+    variants: Dict[Optional[str], bytes] = {None: body}
+    for encoding in available_encodings():
+        compressed = compress(body, encoding, best=True)
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+class CompressionMiddleware:
+    """Compresses complete response bodies of at least minimum_size bytes.
+
+    Uses brotli when it is installed and accepted, gzip otherwise. Responses
+    that already set Content-Encoding (precompressed static files and
+    cached pages) and non-text content types are passed through untouched.
+    Bodies are buffered, which suits this app's JSON and HTML responses.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        chunks = []
+
+        async def send_compressed(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=start["headers"])
+            content_type = headers.get("content-type", "")
+            if (len(body) >= self.minimum_size and "content-encoding" not in headers
+                    and content_type.startswith(COMPRESSIBLE_TYPES)):
+                body = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
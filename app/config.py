@@ -1,14 +1,36 @@
 # app/config.py
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
+from typing import Optional
 import os
 
 # Load environment variables from .env file
 load_dotenv()
 
 class Settings(BaseSettings):
-    google_api_key: str = os.getenv("GOOGLE_API_KEY")
+    google_api_key: Optional[str] = os.getenv("GOOGLE_API_KEY")
     database_url: str = "sqlite:///./test.db"
+
+    # READ replies carry a short summary; rows are only sent in query_results
+    compact_responses: bool = True
+
+    # Responses smaller than this are sent uncompressed
+    compression_min_bytes: int = 1024
+
+    # Idempotency-Key result cache for /query and /approve
+    idempotency_max_entries: int = 10000
+    idempotency_ttl_s: float = 86400
+
+    # Admission control for Gemini calls (see app/agents/scheduler.py)
+    llm_max_concurrency: int = 4
+    llm_max_outstanding: int = 64
+    llm_admission_timeout_s: float = 5
+
+    # Per-user conversation memory (see app/agents/memory.py)
+    session_max_sessions: int = 1000
+    session_idle_ttl_s: float = 1800
+    session_token_budget: int = 2000
+    session_max_inline_tokens: int = 200
     
     class Config:
         env_file = ".env"
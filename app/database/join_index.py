@@ -0,0 +1,159 @@
+# app/database/join_index.py
+from typing import List, Dict, Any, Optional, Set
+import threading
+from app.database.mock_db1 import UsersDB
+from app.database.mock_db2 import ProjectsDB
+from app.database.versioned_store import Record
+
+
+def _key(name: Optional[str]) -> Optional[str]:
+    return name.strip().lower() if isinstance(name, str) and name.strip() else None
+
+
+class ManagerIndex:
+    """Join index between ProjectsDB.manager (a free-text name) and UsersDB.
+
+    A project is linked to its manager's user id when its manager name
+    matches exactly one user (case-insensitively), at the time the project
+    is written or, for unlinked projects, when such a user appears. The link
+    is by id, so it survives the user being renamed, and it is dropped when
+    the user is deleted or the project names a different manager. A name
+    shared by several users is never guessed: projects naming it are
+    reported as ambiguous, including ones linked before a namesake was
+    added, and are linked again once only one user holds the name. All state is updated from the stores' change
+    listeners, so joins are dict lookups instead of scans over both tables.
+    """
+
+    def __init__(self, users_db: UsersDB, projects_db: ProjectsDB):
+        self.users_db = users_db
+        self.projects_db = projects_db
+        self._lock = threading.Lock()
+        self._user_ids_by_name: Dict[str, Set[int]] = {}
+        self._project_ids_by_manager: Dict[str, Set[int]] = {}
+        self._manager_id_by_project: Dict[int, int] = {}
+        self._project_ids_by_user: Dict[int, Set[int]] = {}
+        users_db.subscribe(self._on_user_change)
+        projects_db.subscribe(self._on_project_change)
+
+    @staticmethod
+    def _add(index: Dict[Any, Set[int]], key: Any, record_id: int):
+        if key is not None:
+            index.setdefault(key, set()).add(record_id)
+
+    @staticmethod
+    def _discard(index: Dict[Any, Set[int]], key: Any, record_id: int):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(record_id)
+            if not ids:
+                del index[key]
+
+    # The methods below are called with self._lock held
+
+    def _link(self, project_id: int, user_id: int):
+        self._manager_id_by_project[project_id] = user_id
+        self._add(self._project_ids_by_user, user_id, project_id)
+
+    def _unlink(self, project_id: int):
+        user_id = self._manager_id_by_project.pop(project_id, None)
+        if user_id is not None:
+            self._discard(self._project_ids_by_user, user_id, project_id)
+
+    def _unlink_if_ambiguous(self, name_key: Optional[str]):
+        """Unlink projects naming name_key from its holders once it is shared"""
+        user_ids = self._user_ids_by_name.get(name_key, ())
+        if len(user_ids) < 2:
+            return
+        for project_id in list(self._project_ids_by_manager.get(name_key, ())):
+            if self._manager_id_by_project.get(project_id) in user_ids:
+                self._unlink(project_id)
+
+    def _link_by_name(self, name_key: Optional[str]):
+        """Link unlinked projects naming name_key, if that name is now unique"""
+        user_ids = self._user_ids_by_name.get(name_key, ())
+        if len(user_ids) != 1:
+            return
+        user_id = next(iter(user_ids))
+        for project_id in self._project_ids_by_manager.get(name_key, ()):
+            if project_id not in self._manager_id_by_project:
+                self._link(project_id, user_id)
+
+    def _on_user_change(self, old: Optional[Record], new: Optional[Record]):
+        with self._lock:
+            old_key = _key(old.name) if old is not None else None
+            new_key = _key(new.name) if new is not None else None
+            if old is not None and (new is None or old_key != new_key):
+                self._discard(self._user_ids_by_name, old_key, old.id)
+            if new is None:
+                for project_id in list(self._project_ids_by_user.get(old.id, ())):
+                    self._unlink(project_id)
+                # The remaining holder of the old name may now be unique
+                self._link_by_name(old_key)
+            elif old is None or old_key != new_key:
+                self._add(self._user_ids_by_name, new_key, new.id)
+                self._unlink_if_ambiguous(new_key)
+                self._link_by_name(new_key)
+                if old is not None:
+                    self._link_by_name(old_key)
+
+    def _on_project_change(self, old: Optional[Record], new: Optional[Record]):
+        with self._lock:
+            old_key = _key(old.manager) if old is not None else None
+            new_key = _key(new.manager) if new is not None else None
+            if old is not None and (new is None or old_key != new_key):
+                self._discard(self._project_ids_by_manager, old_key, old.id)
+                self._unlink(old.id)
+            if new is not None and (old is None or old_key != new_key):
+                self._add(self._project_ids_by_manager, new_key, new.id)
+                user_ids = self._user_ids_by_name.get(new_key, ())
+                if len(user_ids) == 1:
+                    self._link(new.id, next(iter(user_ids)))
+
+    def user_ids_for_manager(self, manager: str) -> List[int]:
+        with self._lock:
+            return sorted(self._user_ids_by_name.get(_key(manager), ()))
+
+    def _join(self, project: Dict[str, Any]) -> Dict[str, Any]:
+        """Project row extended with its manager's user fields.
+
+        manager_match is "linked", "ambiguous" (manager_candidate_ids lists
+        the users sharing that name) or "not_found".
+        """
+        row = dict(project)
+        with self._lock:
+            manager_id = self._manager_id_by_project.get(project["id"])
+            candidates = sorted(self._user_ids_by_name.get(_key(project.get("manager")), ()))
+        manager = self.users_db.get_user_by_id(manager_id) if manager_id is not None else None
+        row["manager_id"] = manager["id"] if manager else None
+        row["manager_name"] = manager["name"] if manager else None
+        row["manager_email"] = manager["email"] if manager else None
+        row["manager_department"] = manager["department"] if manager else None
+        if manager:
+            row["manager_match"] = "linked"
+        elif len(candidates) > 1:
+            row["manager_match"] = "ambiguous"
+            row["manager_candidate_ids"] = candidates
+        else:
+            row["manager_match"] = "not_found"
+        return row
+
+    def project_with_manager(self, project_id: int) -> Optional[Dict[str, Any]]:
+        project = self.projects_db.get_project_by_id(project_id)
+        return self._join(project) if project else None
+
+    def projects_managed_by_user(self, user_id: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            project_ids = sorted(self._project_ids_by_user.get(user_id, ()))
+        projects = (self.projects_db.get_project_by_id(project_id) for project_id in project_ids)
+        return [self._join(project) for project in projects if project]
+
+    def projects_by_manager_department(self, department: str) -> List[Dict[str, Any]]:
+        # Only users who manage something can match, so scan managers, not all users
+        with self._lock:
+            manager_ids = sorted(self._project_ids_by_user)
+        results = []
+        for user_id in manager_ids:
+            user = self.users_db.get_user_by_id(user_id)
+            if user and str(user["department"]).lower() == department.lower():
+                results.extend(self.projects_managed_by_user(user_id))
+        return sorted(results, key=lambda project: project["id"])
@@ -1,47 +1,66 @@
 # app/database/mock_db1.py
-from typing import List, Dict, Any, Optional
-from datetime import datetime
-import uuid
+from typing import List, Dict, Any, Optional, Iterator
+from app.database.versioned_store import VersionedStore, Record
+
+class UserRecord(Record):
+    __slots__ = ("name", "email", "department")
+    fields = ("name", "email", "department")
+    interned = ("department",)
+
+class UsersDB(VersionedStore):
+    record_type = UserRecord
 
-class UsersDB:
     def __init__(self):
-        self.users = [
+        super().__init__([
             {"id": 1, "name": "John Doe", "email": "john@example.com", "department": "Engineering"},
             {"id": 2, "name": "Jane Smith", "email": "jane@example.com", "department": "Marketing"},
             {"id": 3, "name": "Bob Johnson", "email": "bob@example.com", "department": "Sales"}
-        ]
-        self.next_id = 4
+        ])
+        # department -> number of users, kept current by our own change listener
+        self._department_counts: Dict[str, int] = {}
+        self.subscribe(self._count_departments)
+
+    def _count_departments(self, old: Optional[UserRecord], new: Optional[UserRecord]):
+        # Updates can carry any value; only string departments are counted
+        if old is not None and isinstance(old.department, str):
+            self._department_counts[old.department] -= 1
+            if not self._department_counts[old.department]:
+                del self._department_counts[old.department]
+        if new is not None and isinstance(new.department, str):
+            self._department_counts[new.department] = self._department_counts.get(new.department, 0) + 1
+
+    def get_departments(self) -> List[str]:
+        return list(self._department_counts)
+
+    @property
+    def users(self) -> List[Dict[str, Any]]:
+        return self._all()
+
+    def iter_users(self) -> Iterator[Dict[str, Any]]:
+        return self._iter()
 
     def get_all_users(self) -> List[Dict[str, Any]]:
-        return self.users
+        return self._all()
 
     def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
-        return next((user for user in self.users if user["id"] == user_id), None)
+        return self._get(user_id)
 
     def get_users_by_department(self, department: str) -> List[Dict[str, Any]]:
-        return [user for user in self.users if user["department"].lower() == department.lower()]
+        department = department.lower()
+        return [user.to_dict() for user in self._snapshot()
+                if isinstance(user.department, str) and user.department.lower() == department]
 
     def create_user(self, name: str, email: str, department: str) -> Dict[str, Any]:
-        user = {
-            "id": self.next_id,
+        return self._insert({
             "name": name,
             "email": email,
             "department": department
-        }
-        self.users.append(user)
-        self.next_id += 1
-        return user
-
-    def update_user(self, user_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        for user in self.users:
-            if user["id"] == user_id:
-                user.update(updates)
-                return user
-        return None
+        })
+
+    def update_user(self, user_id: int, updates: Dict[str, Any],
+                    expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Apply updates atomically; with expected_version, only if the record is still at that version"""
+        return self._update(user_id, updates, expected_version)
 
     def delete_user(self, user_id: int) -> bool:
-        for i, user in enumerate(self.users):
-            if user["id"] == user_id:
-                self.users.pop(i)
-                return True
-        return False
\ No newline at end of file
+        return self._delete(user_id)
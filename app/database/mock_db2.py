@@ -1,48 +1,52 @@
 # app/database/mock_db2.py
-from typing import List, Dict, Any, Optional
-from datetime import datetime
-import uuid
+from typing import List, Dict, Any, Optional, Iterator
+from app.database.versioned_store import VersionedStore, Record
+
+class ProjectRecord(Record):
+    __slots__ = ("name", "status", "budget", "manager")
+    fields = ("name", "status", "budget", "manager")
+    interned = ("status", "manager")
+
+class ProjectsDB(VersionedStore):
+    record_type = ProjectRecord
 
-class ProjectsDB:
     def __init__(self):
-        self.projects = [
+        super().__init__([
             {"id": 1, "name": "Website Redesign", "status": "active", "budget": 50000, "manager": "John Doe"},
             {"id": 2, "name": "Mobile App", "status": "completed", "budget": 75000, "manager": "Jane Smith"},
             {"id": 3, "name": "AI Integration", "status": "planning", "budget": 100000, "manager": "Bob Johnson"}
-        ]
-        self.next_id = 4
+        ])
+
+    @property
+    def projects(self) -> List[Dict[str, Any]]:
+        return self._all()
+
+    def iter_projects(self) -> Iterator[Dict[str, Any]]:
+        return self._iter()
 
     def get_all_projects(self) -> List[Dict[str, Any]]:
-        return self.projects
+        return self._all()
 
     def get_project_by_id(self, project_id: int) -> Optional[Dict[str, Any]]:
-        return next((project for project in self.projects if project["id"] == project_id), None)
+        return self._get(project_id)
 
     def get_projects_by_status(self, status: str) -> List[Dict[str, Any]]:
-        return [project for project in self.projects if project["status"].lower() == status.lower()]
+        status = status.lower()
+        return [project.to_dict() for project in self._snapshot()
+                if isinstance(project.status, str) and project.status.lower() == status]
 
     def create_project(self, name: str, status: str, budget: float, manager: str) -> Dict[str, Any]:
-        project = {
-            "id": self.next_id,
+        return self._insert({
             "name": name,
             "status": status,
             "budget": budget,
             "manager": manager
-        }
-        self.projects.append(project)
-        self.next_id += 1
-        return project
-
-    def update_project(self, project_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        for project in self.projects:
-            if project["id"] == project_id:
-                project.update(updates)
-                return project
-        return None
+        })
+
+    def update_project(self, project_id: int, updates: Dict[str, Any],
+                       expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Apply updates atomically; with expected_version, only if the record is still at that version"""
+        return self._update(project_id, updates, expected_version)
 
     def delete_project(self, project_id: int) -> bool:
-        for i, project in enumerate(self.projects):
-            if project["id"] == project_id:
-                self.projects.pop(i)
-                return True
-        return False
\ No newline at end of file
+        return self._delete(project_id)
@@ -0,0 +1,163 @@
+# app/database/versioned_store.py
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Type, Callable
+import logging
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class VersionConflictError(Exception):
+    """Raised when a compare-and-swap write sees a newer record version"""
+
+    def __init__(self, record_id: int, expected_version: int, actual_version: int):
+        self.record_id = record_id
+        self.expected_version = expected_version
+        self.actual_version = actual_version
+        super().__init__(
+            f"Record {record_id} is at version {actual_version}, expected {expected_version}"
+        )
+
+
+class Record:
+    """Compact, immutable-by-convention row stored in a VersionedStore.
+
+    Subclasses list their columns in `fields` and matching `__slots__`, so a
+    row costs a fixed slot array instead of a per-row dict. String columns
+    named in `interned` share one object per distinct value. Keys outside
+    `fields` (ad-hoc updates) go to the `extra` dict, which stays None for
+    ordinary rows.
+    """
+
+    __slots__ = ("id", "version", "extra")
+    fields: Tuple[str, ...] = ()
+    interned: Tuple[str, ...] = ()
+
+    def __init__(self, id: int, version: int, /, **values: Any):
+        self.id = id
+        self.version = version
+        for name in self.fields:
+            value = values.pop(name, None)
+            if name in self.interned and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, name, value)
+        self.extra = values or None
+
+    def to_dict(self) -> Dict[str, Any]:
+        row = {"id": self.id}
+        for name in self.fields:
+            row[name] = getattr(self, name)
+        if self.extra:
+            row.update(self.extra)
+        row["version"] = self.version
+        return row
+
+    def replace(self, changes: Dict[str, Any]) -> "Record":
+        values = self.to_dict()
+        values.update(changes)
+        del values["id"], values["version"]
+        return type(self)(self.id, self.version + 1, **values)
+
+
+class VersionedStore:
+    """In-memory table with lock-free reads and per-record versions.
+
+    Writers serialize on one lock and change a single dict entry in place,
+    so a write costs O(1) regardless of table size. Records are never
+    mutated once published; an update stores a new record at version + 1,
+    so a reader sees either the whole write or none of it. Readers never
+    take the lock: point lookups are a single dict read, and scans work on
+    a list(...) snapshot of the values, which CPython builds without
+    running Python code and therefore without interleaving a write.
+
+    Listeners registered with subscribe() are called as listener(old, new)
+    for every committed write, in commit order, while the write lock is held;
+    old is None for inserts and new is None for deletes. Listeners must not
+    raise: the write is already committed when they run, so a failing
+    listener is logged and the remaining ones are still called.
+    """
+
+    # Fields callers may not set directly through updates
+    protected_fields = ("id", "version")
+    record_type: Type[Record] = Record
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self._write_lock = threading.Lock()
+        self._listeners: List[Callable[[Optional[Record], Optional[Record]], None]] = []
+        self._rows: Dict[int, Record] = {}
+        for row in rows:
+            values = dict(row)
+            record_id = values.pop("id")
+            self._rows[record_id] = self.record_type(record_id, 1, **values)
+        self._next_id = max(self._rows, default=0) + 1
+
+    @property
+    def next_id(self) -> int:
+        return self._next_id
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def subscribe(self, listener: Callable[[Optional[Record], Optional[Record]], None]):
+        """Register a change listener, first replaying existing records as inserts.
+
+        Replay and registration happen under the write lock, so the listener
+        sees every record exactly once and later writes in commit order.
+        """
+        with self._write_lock:
+            for record in self._rows.values():
+                listener(None, record)
+            self._listeners.append(listener)
+
+    def _notify(self, old: Optional[Record], new: Optional[Record]):
+        for listener in self._listeners:
+            try:
+                listener(old, new)
+            except Exception:
+                record = new if new is not None else old
+                logger.exception("Change listener %r failed for record %s", listener, record.id)
+
+    def _snapshot(self) -> List[Record]:
+        return list(self._rows.values())
+
+    def _iter(self) -> Iterator[Dict[str, Any]]:
+        """Yield rows as dicts one at a time from a snapshot"""
+        for record in self._snapshot():
+            yield record.to_dict()
+
+    def _all(self) -> List[Dict[str, Any]]:
+        return [record.to_dict() for record in self._snapshot()]
+
+    def _get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        record = self._rows.get(record_id)
+        return record.to_dict() if record else None
+
+    def _insert(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        with self._write_lock:
+            record = self.record_type(self._next_id, 1, **fields)
+            self._rows[record.id] = record
+            self._next_id += 1
+            self._notify(None, record)
+            return record.to_dict()
+
+    def _update(self, record_id: int, updates: Dict[str, Any],
+                expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        changes = {k: v for k, v in updates.items() if k not in self.protected_fields}
+        with self._write_lock:
+            current = self._rows.get(record_id)
+            if current is None:
+                return None
+            if expected_version is not None and current.version != expected_version:
+                raise VersionConflictError(record_id, expected_version, current.version)
+            record = current.replace(changes)
+            self._rows[record_id] = record
+            self._notify(current, record)
+            return record.to_dict()
+
+    def _delete(self, record_id: int) -> bool:
+        with self._write_lock:
+            if record_id not in self._rows:
+                return False
+            current = self._rows.pop(record_id)
+            self._notify(current, None)
+            return True
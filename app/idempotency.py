@@ -0,0 +1,102 @@
+# app/idempotency.py
+from typing import Any, Callable, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import time
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "future", "created_at")
+
+    def __init__(self, fingerprint: str, future: "asyncio.Future"):
+        self.fingerprint = fingerprint
+        self.future = future
+        self.created_at = time.monotonic()
+
+
+class IdempotencyCache:
+    """Results of requests carrying an Idempotency-Key, replayed on retries.
+
+    The first request for a key runs its work in the threadpool; duplicates
+    that arrive while it is running await the same result, and later ones
+    get the stored result without any work repeated. A key reused with a
+    different request body is rejected with 422. Failed work is not stored,
+    so the client can retry it. If the caller is cancelled (e.g. the client
+    disconnects), the work keeps running in its thread and the entry stays
+    until it finishes, so a retry waits for that result instead of running
+    the work a second time. Completed entries expire after ttl_s, and
+    the oldest are evicted beyond max_entries. State is per process.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_s: float = 86400):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self):
+        # Entries are in creation order, so expiry stops at the first fresh
+        # one once the size limit is met. In-flight entries are skipped, not
+        # waited on, so one slow request cannot hold up eviction.
+        now = time.monotonic()
+        excess = len(self._entries) - self.max_entries
+        evicted = []
+        for key, entry in self._entries.items():
+            if excess <= 0 and now - entry.created_at <= self.ttl_s:
+                break
+            if entry.future.done():
+                evicted.append(key)
+                excess -= 1
+        for key in evicted:
+            del self._entries[key]
+
+    async def run(self, key: str, fingerprint: str, fn: Callable[[], Any],
+                  should_store: Callable[[Any], bool] = lambda result: True) -> Tuple[Any, bool]:
+        """Return (result, replayed) for fn, running it at most once per key.
+
+        Results for which should_store() is false are shared with in-flight
+        duplicates but not kept for later retries.
+        """
+        self._evict()
+        entry: Optional[_Entry] = self._entries.get(key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used with a different request"
+                )
+            return await asyncio.shield(entry.future), True
+
+        future = asyncio.get_running_loop().create_future()
+        entry = self._entries[key] = _Entry(fingerprint, future)
+        self._evict()
+
+        def finish(task: "asyncio.Future"):
+            # Runs when the thread is done, even if the caller was cancelled
+            # meanwhile, so the entry keeps retries waiting until then
+            store = False
+            try:
+                if not task.cancelled() and task.exception() is None:
+                    store = bool(should_store(task.result()))
+            except Exception:
+                # A failing predicate only means the result is not kept
+                store = False
+            finally:
+                if not store and self._entries.get(key) is entry:
+                    del self._entries[key]
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception() is not None:
+                    future.set_exception(task.exception())
+                    # Mark retrieved so an exception nobody else awaited is not logged
+                    future.exception()
+                else:
+                    future.set_result(task.result())
+
+        asyncio.ensure_future(run_in_threadpool(fn)).add_done_callback(finish)
+        return await asyncio.shield(future), False
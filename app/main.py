@@ -1,20 +1,28 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from pydantic import BaseModel
+import hashlib
 import uuid
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi import Request
 import aiofiles
 import os
 
 # Import from your project structure
-from app.models.schemas import UserRequest, BotResponse, ApprovalRequest, OperationType
+from app.models.schemas import UserRequest, BotResponse, ApprovalRequest, OperationType, DEFAULT_USER_ID
 from app.database.mock_db1 import UsersDB
 from app.database.mock_db2 import ProjectsDB
+from app.database.join_index import ManagerIndex
+from app.agents.memory import sessions
+from app.config import settings
+from app.responses import FastJSONResponse, model_response
+from app.compression import CompressionMiddleware
+from app.assets import StaticAssets, PageCache
+from app.idempotency import IdempotencyCache
 
-app = FastAPI(title="Mini Agentic Bot", version="1.0.0")
+app = FastAPI(title="Mini Agentic Bot", version="1.0.0", default_response_class=FastJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -25,90 +33,114 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON/HTML responses above the size threshold
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_bytes)
+
 # Initialize databases
 users_db = UsersDB()
 projects_db = ProjectsDB()
+manager_index = ManagerIndex(users_db, projects_db)
 
 # Store pending approvals
 pending_approvals: Dict[str, Dict[str, Any]] = {}
 
+# Stored results for requests sent with an Idempotency-Key header
+idempotency_cache = IdempotencyCache(
+    max_entries=settings.idempotency_max_entries,
+    ttl_s=settings.idempotency_ttl_s,
+)
+
 # Add after app initialization
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Static files are precompressed in memory and linked by content-hashed URL;
+# pages don't depend on the request, so each is rendered once and cached
+static_assets = StaticAssets("static")
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["static_url"] = static_assets.url
+pages = PageCache(templates)
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], name="static", include_in_schema=False)
+async def static_files(request: Request, path: str):
+    return static_assets.response(request, path)
 
 # Add these new routes before the existing API routes
 @app.get("/")
 async def read_root(request: Request):
     """Main chat interface"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return pages.response(request, "index.html")
 
 @app.get("/chat")
 async def chat_interface(request: Request):
     """Alternative chat interface"""
-    return templates.TemplateResponse("chat.html", {"request": request})
+    return pages.response(request, "chat.html")
 
 @app.get("/approvals")
 async def approvals_interface(request: Request):
     """Approvals management interface"""
-    return templates.TemplateResponse("approvals.html", {"request": request})
+    return pages.response(request, "approvals.html")
 
 @app.get("/data")
 async def data_interface(request: Request):
     """Data viewing interface"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return pages.response(request, "index.html")
+
 
+def _read_response(summary: str, results: List[Dict[str, Any]]) -> BotResponse:
+    """READ reply; rows come from our own stores, so the model is built without validation"""
+    return BotResponse.model_construct(
+        response=summary if settings.compact_responses else f"{summary}: {results}",
+        operation_type=OperationType.READ,
+        requires_approval=False,
+        proposed_changes=None,
+        query_results=results
+    )
 
-def process_natural_language_query(query: str) -> BotResponse:
+
+def process_natural_language_query(query: str, user_id: str = DEFAULT_USER_ID) -> BotResponse:
     """Process natural language queries using the agentic workflow"""
     query_lower = query.lower()
     
     # Read operations (no approval needed)
     if any(term in query_lower for term in ["show", "list", "get", "find", "display"]):
+        # Follow-ups like "now show only the active ones" reuse the previous entity;
+        # anonymous requests all share DEFAULT_USER_ID, so they get no memory
+        remember = user_id != DEFAULT_USER_ID
         if "user" in query_lower:
+            entity = "user"
+        elif "project" in query_lower:
+            entity = "project"
+        else:
+            entity = sessions.get_state(user_id, "entity") if remember else None
+        if remember and entity is not None:
+            sessions.set_state(user_id, "entity", entity)
+
+        if entity == "user":
             if "engineering" in query_lower:
                 results = users_db.get_users_by_department("Engineering")
-                return BotResponse(
-                    response=f"Found {len(results)} users in Engineering department: {results}",
-                    operation_type=OperationType.READ,
-                    query_results=results
-                )
+                return _read_response(f"Found {len(results)} users in Engineering department", results)
             elif "all" in query_lower or "every" in query_lower:
                 results = users_db.get_all_users()
-                return BotResponse(
-                    response=f"Found {len(results)} users: {results}",
-                    operation_type=OperationType.READ,
-                    query_results=results
-                )
+                return _read_response(f"Found {len(results)} users", results)
             else:
                 results = users_db.get_all_users()
-                return BotResponse(
-                    response=f"Here are all users: {results}",
-                    operation_type=OperationType.READ,
-                    query_results=results
-                )
+                return _read_response("Here are all users", results)
         
-        elif "project" in query_lower:
-            if "active" in query_lower:
+        elif entity == "project":
+            department = None
+            if "manag" in query_lower:
+                department = next((d for d in users_db.get_departments()
+                                   if isinstance(d, str) and d.lower() in query_lower), None)
+            if department:
+                results = manager_index.projects_by_manager_department(department)
+                return _read_response(f"Found {len(results)} projects managed by {department}", results)
+            elif "active" in query_lower:
                 results = projects_db.get_projects_by_status("active")
-                return BotResponse(
-                    response=f"Found {len(results)} active projects: {results}",
-                    operation_type=OperationType.READ,
-                    query_results=results
-                )
+                return _read_response(f"Found {len(results)} active projects", results)
             elif "all" in query_lower or "every" in query_lower:
                 results = projects_db.get_all_projects()
-                return BotResponse(
-                    response=f"Found {len(results)} projects: {results}",
-                    operation_type=OperationType.READ,
-                    query_results=results
-                )
+                return _read_response(f"Found {len(results)} projects", results)
             else:
                 results = projects_db.get_all_projects()
-                return BotResponse(
-                    response=f"Here are all projects: {results}",
-                    operation_type=OperationType.READ,
-                    query_results=results
-                )
+                return _read_response("Here are all projects", results)
     
     # Create operations (require approval)
     elif any(term in query_lower for term in ["create", "add", "new", "make"]):
@@ -194,57 +226,89 @@ def process_natural_language_query(query: str) -> BotResponse:
             proposed_changes=proposed_changes
         )
     
-    # Default response
-    else:
-        return BotResponse(
-            response="I can help you with: \n- Showing users/projects (READ)\n- Creating new users/projects (CREATE)\n- Updating existing data (UPDATE)\n- Removing data (DELETE)\n\nTry: 'Show all users' or 'Create a new project'",
-            operation_type=OperationType.READ
-        )
+    # Default response, also reached when a branch above cannot tell the entity
+    # (e.g. a follow-up with nothing remembered in the session)
+    return BotResponse(
+        response="I can help you with: \n- Showing users/projects (READ)\n- Creating new users/projects (CREATE)\n- Updating existing data (UPDATE)\n- Removing data (DELETE)\n\nTry: 'Show all users' or 'Create a new project'",
+        operation_type=OperationType.READ
+    )
+
+def _run_query(user_request: UserRequest) -> BotResponse:
+    result = process_natural_language_query(user_request.query, user_request.user_id)
+    if user_request.user_id != DEFAULT_USER_ID:
+        sessions.add_turn(user_request.user_id, "user", user_request.query)
+        sessions.add_turn(user_request.user_id, "assistant", result.response)
+    return result
+
+def _run_approval(approval_request: ApprovalRequest) -> Dict[str, Any]:
+    # Claim the request atomically so concurrent approvals cannot both execute it
+    pending_request = pending_approvals.pop(approval_request.request_id, None)
+
+    if not pending_request:
+        raise HTTPException(status_code=404, detail="Approval request not found")
+
+    if not approval_request.approved:
+        return {
+            "status": "rejected",
+            "message": "Operation was rejected by user",
+            "request_id": approval_request.request_id
+        }
+
+    operation = pending_request["operation"]
+    try:
+        # Execute the approved operation
+        if operation == "create_user":
+            result = users_db.create_user("New User", "new@example.com", "General")
+            message = f"User created successfully: {result}"
+        elif operation == "create_project":
+            result = projects_db.create_project("New Project", "planning", 10000, "Manager")
+            message = f"Project created successfully: {result}"
+        else:
+            message = f"Operation '{operation}' executed successfully"
+    except Exception:
+        pending_approvals[approval_request.request_id] = pending_request
+        raise
+
+    return {
+        "status": "approved",
+        "message": message,
+        "request_id": approval_request.request_id
+    }
+
+async def _run_idempotent(endpoint: str, idempotency_key: str, body: BaseModel, fn,
+                          should_store=lambda result: True) -> Tuple[Any, Dict[str, str]]:
+    """Run fn once per Idempotency-Key; retries and in-flight duplicates get the same result"""
+    fingerprint = hashlib.sha256(body.model_dump_json().encode("utf-8")).hexdigest()
+    result, replayed = await idempotency_cache.run(f"{endpoint}:{idempotency_key}", fingerprint, fn,
+                                                   should_store)
+    return result, {"Idempotent-Replayed": "true"} if replayed else {}
 
 @app.post("/query", response_model=BotResponse)
-async def process_query(user_request: UserRequest):
+async def process_query(user_request: UserRequest, idempotency_key: Optional[str] = Header(default=None)):
     try:
-        return process_natural_language_query(user_request.query)
+        if idempotency_key is None:
+            return model_response(_run_query(user_request))
+        # READ results can be whole tables and are safe to repeat, so only
+        # CUD responses (which mint approval requests) are kept for retries
+        result, headers = await _run_idempotent("/query", idempotency_key, user_request,
+                                                lambda: _run_query(user_request),
+                                                lambda result: result.operation_type != OperationType.READ)
+        return model_response(result, headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
 @app.post("/approve")
-async def approve_operation(approval_request: ApprovalRequest):
+async def approve_operation(approval_request: ApprovalRequest, idempotency_key: Optional[str] = Header(default=None)):
     try:
-        pending_request = pending_approvals.get(approval_request.request_id)
-        
-        if not pending_request:
-            raise HTTPException(status_code=404, detail="Approval request not found")
-        
-        if approval_request.approved:
-            operation = pending_request["operation"]
-            
-            # Execute the approved operation
-            if operation == "create_user":
-                result = users_db.create_user("New User", "new@example.com", "General")
-                message = f"User created successfully: {result}"
-            elif operation == "create_project":
-                result = projects_db.create_project("New Project", "planning", 10000, "Manager")
-                message = f"Project created successfully: {result}"
-            else:
-                message = f"Operation '{operation}' executed successfully"
-            
-            del pending_approvals[approval_request.request_id]
-            
-            return {
-                "status": "approved",
-                "message": message,
-                "request_id": approval_request.request_id
-            }
-        else:
-            del pending_approvals[approval_request.request_id]
-            
-            return {
-                "status": "rejected",
-                "message": "Operation was rejected by user",
-                "request_id": approval_request.request_id
-            }
-            
+        if idempotency_key is None:
+            return _run_approval(approval_request)
+        result, headers = await _run_idempotent("/approve", idempotency_key, approval_request,
+                                                lambda: _run_approval(approval_request))
+        return FastJSONResponse(result, headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing approval: {str(e)}")
 
@@ -253,8 +317,8 @@ async def health_check():
     return {
         "status": "healthy", 
         "service": "Mini Agentic Bot",
-        "users_count": len(users_db.users),
-        "projects_count": len(projects_db.projects)
+        "users_count": len(users_db),
+        "projects_count": len(projects_db)
     }
 
 @app.get("/pending-approvals")
@@ -269,13 +333,21 @@ async def get_pending_approvals():
         }
     }
 
+@app.get("/sessions/{user_id}/refs/{ref_id}")
+async def get_session_ref(user_id: str, ref_id: str):
+    """Full text of a large output that was replaced by a reference in session memory"""
+    content = sessions.get_ref(user_id, ref_id)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Reference not found")
+    return {"ref_id": ref_id, "content": content}
+
 @app.get("/data/users")
 async def get_all_users():
-    return {"users": users_db.get_all_users()}
+    return FastJSONResponse({"users": users_db.get_all_users()})
 
 @app.get("/data/projects")
 async def get_all_projects():
-    return {"projects": projects_db.get_all_projects()}
+    return FastJSONResponse({"projects": projects_db.get_all_projects()})
 
 @app.get("/")
 async def root():
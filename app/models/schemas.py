@@ -9,9 +9,12 @@ class OperationType(str, Enum):
     UPDATE = "update"
     DELETE = "delete"
 
+# Requests without a user_id share this id, so it gets no session memory
+DEFAULT_USER_ID = "default_user"
+
 class UserRequest(BaseModel):
     query: str
-    user_id: str = "default_user"
+    user_id: str = DEFAULT_USER_ID
 
 class BotResponse(BaseModel):
     response: str
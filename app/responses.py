@@ -0,0 +1,40 @@
+# app/responses.py
+from typing import Any, Dict, Optional
+from enum import Enum
+import json
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, BaseModel):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that encodes content as-is, without FastAPI's jsonable_encoder.
+
+    Routes return one of these directly with plain dicts, lists and enums
+    (store rows are already JSON-safe), so nothing is re-validated or copied
+    on the way out. Uses orjson when installed, else compact stdlib json.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default)
+        return json.dumps(content, default=_default, ensure_ascii=False,
+                          separators=(",", ":")).encode("utf-8")
+
+
+def model_response(model: BaseModel, headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    """Send a trusted model's fields without re-validating or dumping them"""
+    return FastJSONResponse(dict(model), headers=headers)
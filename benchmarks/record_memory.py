@@ -0,0 +1,62 @@
+# benchmarks/record_memory.py
+"""Bytes per row for plain dict rows versus the compact store records.
+
+Run from the repository root: python -m benchmarks.record_memory
+"""
+import gc
+import tracemalloc
+
+from app.database.mock_db1 import UserRecord
+from app.database.mock_db2 import ProjectRecord
+
+ROWS = 200_000
+DEPARTMENTS = ["Engineering", "Marketing", "Sales", "Finance", "Support"]
+STATUSES = ["active", "completed", "planning"]
+MANAGERS = ["John Doe", "Jane Smith", "Bob Johnson"]
+
+
+def user_values(i: int):
+    # Build repeating strings at runtime so they are distinct objects,
+    # like values decoded from a request body
+    return {
+        "name": f"User {i}",
+        "email": f"user{i}@example.com",
+        "department": "".join(DEPARTMENTS[i % len(DEPARTMENTS)]),
+    }
+
+
+def project_values(i: int):
+    return {
+        "name": f"Project {i}",
+        "status": "".join(STATUSES[i % len(STATUSES)]),
+        "budget": 1000 * i,
+        "manager": "".join(MANAGERS[i % len(MANAGERS)]),
+    }
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    rows = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return current / ROWS
+
+
+def main():
+    print(f"Record memory benchmark: {ROWS:,} rows")
+    print("=" * 60)
+    cases = [
+        ("users", user_values, UserRecord),
+        ("projects", project_values, ProjectRecord),
+    ]
+    for label, values, record_type in cases:
+        before = measure(lambda: {i: dict(values(i), id=i, version=1) for i in range(ROWS)})
+        after = measure(lambda: {i: record_type(i, 1, **values(i)) for i in range(ROWS)})
+        print(f"{label:<9} dict rows: {before:7.1f} B/row   records: {after:7.1f} B/row   "
+              f"saved: {1 - after / before:.0%}")
+
+
+if __name__ == "__main__":
+    main()
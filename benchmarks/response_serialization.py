@@ -0,0 +1,68 @@
+# benchmarks/response_serialization.py
+"""Bytes and CPU per /query READ response, before and after compact mode.
+
+"before" mirrors the original path: the rows repeated as a repr string in
+`response`, a validated BotResponse, then FastAPI's jsonable_encoder and
+JSONResponse. "after" is the compact summary, model_construct and
+FastJSONResponse.
+
+Run from the repository root: python -m benchmarks.response_serialization
+"""
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.database.mock_db1 import UserRecord
+from app.models.schemas import BotResponse, OperationType
+from app.responses import model_response, orjson
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def before(results):
+    response = BotResponse(
+        response=f"Found {len(results)} users: {results}",
+        operation_type=OperationType.READ,
+        query_results=results
+    )
+    return JSONResponse(jsonable_encoder(response)).body
+
+
+def after(results):
+    response = BotResponse.model_construct(
+        response=f"Found {len(results)} users",
+        operation_type=OperationType.READ,
+        requires_approval=False,
+        proposed_changes=None,
+        query_results=results
+    )
+    return model_response(response).body
+
+
+def measure(build, results, repeat: int):
+    start = time.process_time()
+    for _ in range(repeat):
+        body = build(results)
+    return len(body), (time.process_time() - start) / repeat
+
+
+def main():
+    print(f"Response serialization benchmark (encoder: {'orjson' if orjson else 'json'})")
+    print("=" * 60)
+    rows = [
+        UserRecord(i, 1, name=f"User {i}", email=f"user{i}@example.com", department="Engineering").to_dict()
+        for i in range(1, max(SIZES) + 1)
+    ]
+
+    for size in SIZES:
+        results = rows[:size]
+        repeat = max(1, 20_000 // size)
+        before_bytes, before_cpu = measure(before, results, repeat)
+        after_bytes, after_cpu = measure(after, results, repeat)
+        print(f"{size:>7,} rows  before: {before_bytes / 1024:9.1f} KiB {before_cpu * 1000:8.1f} ms   "
+              f"after: {after_bytes / 1024:9.1f} KiB {after_cpu * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,28 @@ const API_BASE = '';
 // DOM Elements
 let chatMessagesContainer;
 
+// Per-browser id, so each visitor gets their own conversation on the server
+const CLIENT_ID = getClientId();
+
+function getClientId() {
+    const key = 'agentic-bot-client-id';
+    let id = null;
+    try {
+        id = localStorage.getItem(key);
+    } catch (e) {
+        // Storage unavailable (e.g. privacy mode): fall back to a per-page id
+    }
+    if (!id) {
+        id = 'web-' + (window.crypto && crypto.randomUUID
+            ? crypto.randomUUID()
+            : Date.now().toString(36) + Math.random().toString(36).slice(2));
+        try {
+            localStorage.setItem(key, id);
+        } catch (e) {}
+    }
+    return id;
+}
+
 // Initialize when DOM is loaded
 document.addEventListener('DOMContentLoaded', function() {
     initializeApp();
@@ -53,7 +75,7 @@ async function handleChatSubmit(event) {
             },
             body: JSON.stringify({
                 query: query,
-                user_id: 'web_user'
+                user_id: CLIENT_ID
             })
         });
         
@@ -169,7 +191,7 @@ async function handleApproval(requestId, approved) {
             },
             body: JSON.stringify({
                 request_id: requestId,
-                user_id: 'web_user',
+                user_id: CLIENT_ID,
                 approved: approved
             })
         });
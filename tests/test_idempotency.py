@@ -0,0 +1,166 @@
+# tests/test_idempotency.py
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.idempotency import IdempotencyCache
+
+
+class _Counter:
+    def __init__(self, result="done", delay=0.0):
+        self.result = result
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return self.result
+
+
+def test_retry_replays_stored_result():
+    cache = IdempotencyCache()
+    fn = _Counter()
+
+    async def scenario():
+        first = await cache.run("k", "body", fn)
+        second = await cache.run("k", "body", fn)
+        return first, second
+
+    assert asyncio.run(scenario()) == (("done", False), ("done", True))
+    assert fn.calls == 1
+
+
+def test_in_flight_duplicates_wait_for_first_result():
+    cache = IdempotencyCache()
+    fn = _Counter(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.run("k", "body", fn) for _ in range(3)))
+
+    results = asyncio.run(scenario())
+    assert [result for result, _ in results] == ["done"] * 3
+    assert sorted(replayed for _, replayed in results) == [False, True, True]
+    assert fn.calls == 1
+
+
+def test_key_reused_with_different_body_is_rejected():
+    cache = IdempotencyCache()
+
+    async def scenario():
+        await cache.run("k", "body", _Counter())
+        await cache.run("k", "other body", _Counter())
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(scenario())
+    assert excinfo.value.status_code == 422
+
+
+def test_failed_work_is_not_stored():
+    cache = IdempotencyCache()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError("boom")
+        return "ok"
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await cache.run("k", "body", flaky)
+        return await cache.run("k", "body", flaky)
+
+    assert asyncio.run(scenario()) == ("ok", False)
+    assert len(attempts) == 2
+
+
+def test_entries_expire_after_ttl_and_beyond_max_entries():
+    cache = IdempotencyCache(max_entries=2, ttl_s=0.05)
+    fn = _Counter()
+
+    async def scenario():
+        for key in ("a", "b", "c"):
+            await cache.run(key, "body", fn)
+        # "a" was the oldest past max_entries
+        assert (await cache.run("a", "body", fn))[1] is False
+        await asyncio.sleep(0.1)
+        assert (await cache.run("b", "body", fn))[1] is False
+
+    asyncio.run(scenario())
+    assert fn.calls == 5
+    assert len(cache) == 1
+
+
+def test_cancelled_caller_keeps_entry_until_work_finishes():
+    cache = IdempotencyCache()
+    fn = _Counter(delay=0.1)
+
+    async def scenario():
+        first = asyncio.ensure_future(cache.run("k", "body", fn))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        # The retry waits for the thread still running the first attempt
+        return await cache.run("k", "body", fn)
+
+    assert asyncio.run(scenario()) == ("done", True)
+    assert fn.calls == 1
+
+
+def test_unstorable_results_are_shared_but_not_kept():
+    cache = IdempotencyCache()
+    fn = _Counter(delay=0.05)
+    never = lambda result: False
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.run("k", "body", fn, never) for _ in range(2)))
+        assert fn.calls == 1
+        assert len(cache) == 0
+        results.append(await cache.run("k", "body", fn, never))
+        return results
+
+    assert [replayed for _, replayed in asyncio.run(scenario())] == [False, True, False]
+    assert fn.calls == 2
+
+
+def test_failing_should_store_still_resolves_and_drops_entry():
+    cache = IdempotencyCache()
+    fn = _Counter(result=None, delay=0.05)
+
+    def broken(result):
+        return result.operation_type
+
+    async def scenario():
+        return await asyncio.wait_for(
+            asyncio.gather(*(cache.run("k", "body", fn, broken) for _ in range(2))), timeout=2)
+
+    assert [result for result, _ in asyncio.run(scenario())] == [None, None]
+    assert fn.calls == 1
+    assert len(cache) == 0
+
+
+def test_eviction_skips_in_flight_entries():
+    cache = IdempotencyCache(max_entries=1, ttl_s=0.05)
+    slow = _Counter(delay=0.3)
+    fn = _Counter()
+
+    async def scenario():
+        running = asyncio.ensure_future(cache.run("slow", "body", slow))
+        await asyncio.sleep(0.02)
+        for key in ("a", "b", "c"):
+            await cache.run(key, "body", fn)
+        # Completed entries behind the in-flight one were still evicted
+        assert list(cache._entries) == ["slow", "c"]
+        await asyncio.sleep(0.1)
+        await cache.run("d", "body", fn)
+        assert list(cache._entries) == ["slow", "d"]
+        await running
+
+    asyncio.run(scenario())
@@ -0,0 +1,37 @@
+# tests/test_join_index.py
+from app.database.mock_db1 import UsersDB
+from app.database.mock_db2 import ProjectsDB
+from app.database.join_index import ManagerIndex
+
+
+def _setup():
+    users_db, projects_db = UsersDB(), ProjectsDB()
+    return users_db, projects_db, ManagerIndex(users_db, projects_db)
+
+
+def test_adding_a_namesake_makes_existing_and_new_projects_ambiguous():
+    users_db, projects_db, index = _setup()
+    assert index.project_with_manager(2)["manager_match"] == "linked"
+
+    namesake = users_db.create_user("Jane Smith", "jane2@example.com", "Sales")
+    project = projects_db.create_project("Launch", "planning", 1000, "Jane Smith")
+    for project_id in (2, project["id"]):
+        row = index.project_with_manager(project_id)
+        assert row["manager_match"] == "ambiguous"
+        assert row["manager_candidate_ids"] == [2, namesake["id"]]
+    # Neither namesake's department claims the projects
+    assert index.projects_by_manager_department("Marketing") == []
+    assert index.projects_by_manager_department("Sales") == [index.project_with_manager(3)]
+
+    users_db.delete_user(namesake["id"])
+    for project_id in (2, project["id"]):
+        assert index.project_with_manager(project_id)["manager_id"] == 2
+
+
+def test_link_survives_rename_and_is_not_taken_by_a_later_namesake():
+    users_db, _, index = _setup()
+    users_db.update_user(2, {"name": "Jane Doe"})
+    users_db.create_user("Jane Smith", "jane2@example.com", "Sales")
+
+    row = index.project_with_manager(2)
+    assert (row["manager_match"], row["manager_id"], row["manager_name"]) == ("linked", 2, "Jane Doe")
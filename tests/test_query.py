@@ -0,0 +1,30 @@
+# tests/test_query.py
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+
+def _ask(query, user_id=None, headers=None):
+    body = {"query": query} if user_id is None else {"query": query, "user_id": user_id}
+    return client.post("/query", json=body, headers=headers or {})
+
+
+def test_follow_up_without_remembered_entity_gets_help():
+    for user_id in (None, "client-without-history"):
+        response = _ask("now show only the active ones", user_id)
+        assert response.status_code == 200
+        assert response.json()["response"].startswith("I can help you with")
+
+
+def test_follow_up_reuses_remembered_entity():
+    _ask("show projects", "client-with-history")
+    response = _ask("now show only the active ones", "client-with-history")
+    assert response.json()["response"] == "Found 1 active projects"
+
+
+def test_unmatched_read_with_idempotency_key_does_not_hang():
+    response = _ask("show me something", headers={"Idempotency-Key": "unmatched-read"})
+    assert response.status_code == 200
+    assert response.json()["operation_type"] == "read"
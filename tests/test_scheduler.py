@@ -0,0 +1,111 @@
+# tests/test_scheduler.py
+import threading
+import time
+
+import pytest
+
+from app.agents.scheduler import CallScheduler, SchedulerOverloadedError
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_submit_returns_result_and_propagates_errors():
+    def fn(x):
+        if x < 0:
+            raise ValueError("negative")
+        return x * 2
+
+    scheduler = CallScheduler(fn, max_concurrency=2)
+    assert scheduler.submit("u", 21) == 42
+    with pytest.raises(ValueError):
+        scheduler.submit("u", -1)
+    assert scheduler.stats()["calls"] == 2
+
+
+def test_concurrency_never_exceeds_limit():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fn(x):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return x
+
+    scheduler = CallScheduler(fn, max_concurrency=3, max_outstanding=100)
+    threads = [_start(scheduler.submit, f"u{i % 4}", i) for i in range(20)]
+    for thread in threads:
+        thread.join()
+    assert peak == 3
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_sheds_once_outstanding_limit_is_reached():
+    gate = threading.Event()
+    scheduler = CallScheduler(lambda x: gate.wait(), max_concurrency=1, max_outstanding=2)
+    threads = [_start(scheduler.submit, "u", i) for i in range(2)]
+    _wait_for(lambda: scheduler.stats()["queue_depth"] + scheduler.stats()["in_flight"] == 2)
+
+    with pytest.raises(SchedulerOverloadedError):
+        scheduler.submit("u", 99)
+    assert scheduler.stats()["shed"] == 1
+
+    gate.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_admission_waits_for_room_before_shedding():
+    gate = threading.Event()
+    scheduler = CallScheduler(lambda x: gate.wait(0.1) or x, max_concurrency=1,
+                              max_outstanding=1, admission_timeout_s=2)
+    first = _start(scheduler.submit, "u", 1)
+    _wait_for(lambda: scheduler.stats()["in_flight"] == 1)
+    # Admitted once the first call finishes, within the admission timeout
+    assert scheduler.submit("u", 2) == 2
+    first.join()
+    assert scheduler.stats()["shed"] == 0
+
+
+def test_calls_are_started_round_robin_across_users():
+    gate = threading.Event()
+    order = []
+
+    def fn(payload):
+        if payload == "blocker":
+            gate.wait()
+        else:
+            order.append(payload)
+        return payload
+
+    scheduler = CallScheduler(fn, max_concurrency=1, max_outstanding=100)
+    threads = [_start(scheduler.submit, "busy", "blocker")]
+    _wait_for(lambda: scheduler.stats()["in_flight"] == 1)
+
+    # One busy user queues three calls before another user's single call
+    for payload in ("busy-1", "busy-2", "busy-3"):
+        threads.append(_start(scheduler.submit, "busy", payload))
+        _wait_for(lambda: scheduler.stats()["queue_depth"] == len(threads) - 1)
+    threads.append(_start(scheduler.submit, "quiet", "quiet-1"))
+    _wait_for(lambda: scheduler.stats()["queue_depth"] == 4)
+
+    gate.set()
+    for thread in threads:
+        thread.join()
+    assert order == ["busy-1", "quiet-1", "busy-2", "busy-3"]
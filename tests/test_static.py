@@ -0,0 +1,31 @@
+# tests/test_static.py
+from fastapi.testclient import TestClient
+
+from app.main import app, static_assets
+
+client = TestClient(app)
+
+
+def test_head_is_served_like_get():
+    get = client.get("/static/css/style.css")
+    head = client.head("/static/css/style.css")
+    assert head.status_code == 200
+    assert head.content == b""
+    assert head.headers["etag"] == get.headers["etag"]
+    assert client.head(static_assets.url("css/style.css")).status_code == 200
+
+
+def test_each_encoding_has_its_own_etag():
+    gzip = client.get("/static/css/style.css", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/static/css/style.css", headers={"Accept-Encoding": "identity"})
+    assert gzip.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in identity.headers
+    assert gzip.headers["etag"] != identity.headers["etag"]
+
+    # A validator for one representation does not revalidate the other
+    revalidated = client.get("/static/css/style.css", headers={
+        "Accept-Encoding": "identity", "If-None-Match": gzip.headers["etag"]})
+    assert revalidated.status_code == 200
+    revalidated = client.get("/static/css/style.css", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": gzip.headers["etag"]})
+    assert revalidated.status_code == 304
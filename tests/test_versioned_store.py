@@ -0,0 +1,35 @@
+# tests/test_versioned_store.py
+from app.database.mock_db1 import UsersDB
+from app.database.mock_db2 import ProjectsDB
+from app.database.join_index import ManagerIndex
+
+
+def test_unhashable_department_is_committed_and_indexes_stay_current():
+    users_db = UsersDB()
+    index = ManagerIndex(users_db, ProjectsDB())
+
+    user = users_db.update_user(1, {"department": ["x"]})
+    assert user["version"] == 2
+    assert sorted(users_db.get_departments()) == ["Marketing", "Sales"]
+    assert users_db.get_users_by_department("Engineering") == []
+
+    users_db.update_user(1, {"name": "Johnny", "department": "Engineering"})
+    assert "Engineering" in users_db.get_departments()
+    assert index.project_with_manager(1)["manager_name"] == "Johnny"
+
+
+def test_failing_listener_does_not_stop_the_others_or_the_write():
+    users_db = UsersDB()
+    seen = []
+
+    def broken(old, new):
+        raise RuntimeError("listener bug")
+
+    users_db.subscribe(lambda old, new: None)
+    users_db._listeners.insert(0, broken)
+    users_db.subscribe(lambda old, new: seen.append(new.id if new else None))
+    seen.clear()
+
+    assert users_db.update_user(2, {"email": "jane@new.example.com"})["version"] == 2
+    assert seen == [2]
+    assert users_db.get_user_by_id(2)["email"] == "jane@new.example.com"